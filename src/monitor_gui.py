@@ -21,13 +21,25 @@ from tkinter import ttk, font
 import paho.mqtt.client as mqtt
 import json
 import time
-import threading
+import queue
 import argparse
+import logging
 import os
+from bisect import bisect_right
 from pathlib import Path
 from dotenv import load_dotenv
-from collections import defaultdict
-from typing import Dict, List, Optional
+from collections import defaultdict, deque
+from functools import lru_cache
+from typing import Dict, Optional
+
+try:
+    # Optional C parser; takes the raw payload bytes directly
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - [GUI] - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
 
 # Color scheme for risk levels
 COLORS = {
@@ -43,77 +55,204 @@ COLORS = {
     'alert': '#c0392b'      # Dark red for alerts
 }
 
+# Seconds between stale-sensor sweeps (UI refreshes every 500ms)
+CLEANUP_INTERVAL = 5
+
+
+# Risk tiers: upper bounds in hundredths (int(risk*100)) and their display
+_RISK_THRESHOLDS = (30, 60, 80)
+_RISK_COLORS = (COLORS['safe'], COLORS['low'], COLORS['warning'], COLORS['critical'])
+_RISK_TEXTS = ("SAFE", "LOW RISK", "WARNING", "CRITICAL")
+
+
+@lru_cache(maxsize=101)
+def _classify_risk(q: int) -> tuple:
+    """Get (color, text) for a risk level quantized to hundredths."""
+    i = bisect_right(_RISK_THRESHOLDS, q)
+    return _RISK_COLORS[i], _RISK_TEXTS[i]
+
+
+@lru_cache(maxsize=64)
+def _sensor_count_text(n: int) -> str:
+    """Sensor count label text."""
+    if n == 0:
+        return "No sensors"
+    return f"{n} sensor{'s' if n > 1 else ''}"
+
+
+@lru_cache(maxsize=64)
+def _alert_count_text(n: int) -> str:
+    """Alert indicator label text."""
+    if n == 0:
+        return ""
+    return f"[ALERT] {n} ALERT{'S' if n > 1 else ''}"
+
+
+@lru_cache(maxsize=1024)
+def _parse_topic(topic: str) -> Optional[tuple]:
+    """
+    Split weather/<type>/<sector>/<sensor_type>/<sensor_id> into
+    (sector, sensor_id). Distinct topics are bounded by the number
+    of sensors, so results are cached.
+    """
+    parts = topic.split('/', 4)
+    if len(parts) < 4:
+        return None
+    return parts[2], parts[4] if len(parts) > 4 else None
+
+
+def _set(panel, key: str, widget, text: str, fg: Optional[str] = None):
+    """Update a panel label's text variable (and color) only if they changed."""
+    if panel._last.get(key) != (text, fg):
+        panel.vars[key].set(text)
+        if fg is not None:
+            widget.config(fg=fg)
+        panel._last[key] = (text, fg)
+
+
+class SensorRecord:
+    """Latest belief and learning state reported by one sensor."""
+    
+    __slots__ = ('risk', 'last_update', 'sensitivity', 'failures')
+    
+    def __init__(self, risk: float, last_update: float):
+        self.risk = risk
+        self.last_update = last_update
+        self.sensitivity: Optional[float] = None
+        self.failures: Optional[int] = None
+
 
 class SectorState:
     """Represents the state of a single sector."""
     
+    __slots__ = (
+        'sector_name', 'sensors', 'alerts', 'sensor_status',
+        'failures_total', 'failures_count', 'dirty',
+    )
+    
     def __init__(self, sector_name: str):
         self.sector_name = sector_name
-        self.active_sensors: Dict[str, float] = {}  # {sensor_id: risk_level}
-        self.last_update: Dict[str, float] = {}     # {sensor_id: timestamp}
-        self.alerts: List[Dict] = []                 # Active alerts
+        self.sensors: Dict[str, SensorRecord] = {}  # Active sensors
+        self.alerts: deque = deque()                 # Active alerts (oldest first)
         self.sensor_status: Dict[str, str] = {}     # {sensor_id: "online"/"offline"}
-        self.sensor_sensitivity: Dict[str, float] = {}  # {sensor_id: sensitivity}
-        self.sensor_failures: Dict[str, int] = {}       # {sensor_id: total_failures}
         
-    def add_belief(self, sensor_id: str, risk_level: float, sensitivity: float = None, 
-                   false_alarms: int = None, missed_events: int = None):
-        """Update sensor risk belief and learning parameters."""
-        self.active_sensors[sensor_id] = risk_level
-        self.last_update[sensor_id] = time.time()
+        # Running integer aggregates over self.sensors, kept in step by the
+        # mutators. Float averages are summed on demand instead: a sector
+        # holds only a handful of sensors, and a running float sum keeps
+        # rounding error (e.g. -0.00 once every sensor is back at 0.0).
+        self.failures_total = 0
+        self.failures_count = 0     # Sensors that reported failure counts
+        self.dirty = True  # Panel needs repainting
+        
+    def add_belief(self, sensor_id: str, risk_level: float, now: float,
+                   sensitivity: float = None, false_alarms: int = None,
+                   missed_events: int = None) -> int:
+        """
+        Update sensor risk belief and learning parameters (now: time.monotonic()).
+        Returns the change in active sensor count (1 for a new sensor, else 0).
+        """
+        added = 0
+        rec = self.sensors.get(sensor_id)
+        if rec is None:
+            rec = self.sensors[sensor_id] = SensorRecord(risk_level, now)
+            added = 1
+        else:
+            rec.risk = risk_level
+            rec.last_update = now
         
         if sensitivity is not None:
-            self.sensor_sensitivity[sensor_id] = sensitivity
+            rec.sensitivity = sensitivity
         if false_alarms is not None and missed_events is not None:
-            self.sensor_failures[sensor_id] = false_alarms + missed_events
+            failures = false_alarms + missed_events
+            if rec.failures is None:
+                self.failures_count += 1
+                self.failures_total += failures
+            else:
+                self.failures_total += failures - rec.failures
+            rec.failures = failures
+        self.dirty = True
+        return added
         
-    def add_alert(self, alert_data: Dict):
-        """Add an alert to the sector."""
-        alert_data['timestamp'] = time.time()
+    def add_alert(self, alert_data: Dict, now: float) -> int:
+        """
+        Add an alert to the sector (now: time.monotonic()).
+        Returns the change in active alert count.
+        """
+        alert_data['timestamp'] = now
         self.alerts.append(alert_data)
-        # Keep only recent alerts (last 60 seconds)
-        current_time = time.time()
-        self.alerts = [a for a in self.alerts if current_time - a['timestamp'] < 60]
-        
-    def update_status(self, sensor_id: str, status: str):
-        """Update sensor online/offline status."""
+        delta = 1
+        # Keep only recent alerts (last 60 seconds); alerts arrive in order,
+        # so stale ones are always at the left end
+        cutoff = now - 60
+        while self.alerts and self.alerts[0]['timestamp'] <= cutoff:
+            self.alerts.popleft()
+            delta -= 1
+        self.dirty = True
+        return delta
+        
+    def update_status(self, sensor_id: str, status: str) -> int:
+        """
+        Update sensor online/offline status.
+        Returns the change in active sensor count (-1 if it went offline, else 0).
+        """
+        removed = 0
         self.sensor_status[sensor_id] = status
-        if status == "offline" and sensor_id in self.active_sensors:
-            del self.active_sensors[sensor_id]
+        if status == "offline":
+            rec = self.sensors.pop(sensor_id, None)
+            if rec is not None:
+                self._forget(rec)
+                removed = 1
+        self.dirty = True
+        return -removed
             
-    def cleanup_stale_data(self, timeout: float = 30):
-        """Remove sensors that haven't updated recently."""
-        current_time = time.time()
+    def cleanup_stale_data(self, now: float, timeout: float = 30) -> int:
+        """
+        Remove sensors that haven't updated recently (now: time.monotonic()).
+        Returns the change in active sensor count.
+        """
         stale_sensors = [
-            sid for sid, ts in self.last_update.items()
-            if current_time - ts > timeout
+            sid for sid, rec in self.sensors.items()
+            if now - rec.last_update > timeout
         ]
         for sid in stale_sensors:
-            if sid in self.active_sensors:
-                del self.active_sensors[sid]
-            if sid in self.last_update:
-                del self.last_update[sid]
+            self._forget(self.sensors.pop(sid))
+        if stale_sensors:
+            self.dirty = True
+        return -len(stale_sensors)
+            
+    def _forget(self, rec: SensorRecord):
+        """Take a removed sensor's values out of the running aggregates."""
+        if rec.failures is not None:
+            self.failures_count -= 1
+            self.failures_total -= rec.failures
                 
     def get_average_risk(self) -> Optional[float]:
         """Calculate average risk across active sensors."""
-        if not self.active_sensors:
+        if not self.sensors:
+            return None
+        return sum(rec.risk for rec in self.sensors.values()) / len(self.sensors)
+        
+    def get_average_sensitivity(self) -> Optional[float]:
+        """Average sensitivity reported by the sector's active sensors."""
+        values = [rec.sensitivity for rec in self.sensors.values() if rec.sensitivity is not None]
+        if not values:
             return None
-        return sum(self.active_sensors.values()) / len(self.active_sensors)
+        return sum(values) / len(values)
         
     def has_disagreement(self, threshold: float = 0.3) -> bool:
         """
         Detect disagreement between sensors.
         Disagreement = large variation in risk levels.
         """
-        if len(self.active_sensors) < 2:
+        if len(self.sensors) < 2:
             return False
-        risks = list(self.active_sensors.values())
+        risks = [rec.risk for rec in self.sensors.values()]
         risk_range = max(risks) - min(risks)
         return risk_range > threshold
         
     def is_active(self) -> bool:
         """Check if any sensor is active in this sector."""
-        return len(self.active_sensors) > 0
+        return len(self.sensors) > 0
         
     def has_alerts(self) -> bool:
         """Check if there are active alerts."""
@@ -128,15 +267,30 @@ class MonitorGUI:
         self.port = port
         
         # Sector data
+        self.sector_names = tuple(f"sector{i}" for i in range(1, 7))
         self.sectors: Dict[str, SectorState] = {
-            f"sector{i}": SectorState(f"sector{i}") 
-            for i in range(1, 7)
+            name: SectorState(name) for name in self.sector_names
         }
-        
-        # MQTT client
+        # Running totals, adjusted by the deltas the SectorState mutators return
+        self.total_sensors = 0
+        self.total_alerts = 0
+        self.status_totals = None  # Totals last shown in the status bar
+        self.last_cleanup = time.monotonic()
+        
+        # (handler, topic, payload) from the MQTT thread, drained on the Tk
+        # thread. Alerts have their own queue, served first; beliefs and status
+        # share one FIFO so an "offline" and a belief from the reconnected
+        # sensor are applied in the order they arrived.
+        self.alert_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.state_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._ingest_order = (self.alert_queue, self.state_queue)
+        
+        # MQTT client (Paho routes each topic family to its own callback)
         self.client = mqtt.Client(client_id="monitor_gui")
         self.client.on_connect = self.on_connect
-        self.client.on_message = self.on_message
+        self.client.message_callback_add("weather/belief/#", self._on_belief)
+        self.client.message_callback_add("weather/alert/#", self._on_alert)
+        self.client.message_callback_add("weather/status/#", self._on_status)
         
         # GUI setup
         self.root = tk.Tk()
@@ -149,10 +303,11 @@ class MonitorGUI:
         self.root.grid_columnconfigure(0, weight=1)
         
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
-        # Start MQTT in background thread
-        self.mqtt_thread = threading.Thread(target=self.mqtt_loop, daemon=True)
-        self.mqtt_thread.start()
+        # Start Paho's own network thread (connects and reconnects in background)
+        self.client.connect_async(self.broker, self.port, keepalive=60)
+        self.client.loop_start()
         
         # Schedule periodic UI updates
         self.update_ui()
@@ -160,6 +315,17 @@ class MonitorGUI:
     def setup_ui(self):
         """Create the user interface."""
         
+        # Shared font objects, one per typographic role (reused by all panels)
+        self.fonts = {
+            'title': font.Font(family='Arial', size=24, weight='bold'),
+            'subtitle': font.Font(family='Arial', size=12),
+            'header': font.Font(family='Arial', size=14, weight='bold'),
+            'risk': font.Font(family='Arial', size=12, weight='bold'),
+            'body': font.Font(family='Arial', size=10),
+            'indicator': font.Font(family='Arial', size=9, weight='bold'),
+            'small': font.Font(family='Arial', size=8),
+        }
+        
         # Title bar
         title_frame = tk.Frame(self.root, bg=COLORS['bg_dark'], pady=20)
         title_frame.grid(row=0, column=0, sticky='ew')
@@ -167,7 +333,7 @@ class MonitorGUI:
         title_label = tk.Label(
             title_frame,
             text="Weather Monitoring System",
-            font=('Arial', 24, 'bold'),
+            font=self.fonts['title'],
             bg=COLORS['bg_dark'],
             fg='#ffffff'
         )
@@ -176,7 +342,7 @@ class MonitorGUI:
         subtitle_label = tk.Label(
             title_frame,
             text="Distributed AI Monitoring Dashboard",
-            font=('Arial', 12),
+            font=self.fonts['subtitle'],
             bg=COLORS['bg_dark'],
             fg='#ffffff'
         )
@@ -196,7 +362,7 @@ class MonitorGUI:
         self.sector_panels = {}
         positions = [(0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (1, 2)]
         
-        for idx, sector_name in enumerate(sorted(self.sectors.keys())):
+        for idx, sector_name in enumerate(self.sector_names):
             row, col = positions[idx]
             panel = self.create_sector_panel(main_frame, sector_name)
             panel.grid(row=row, column=col, padx=10, pady=10, sticky='nsew')
@@ -209,7 +375,7 @@ class MonitorGUI:
         self.status_label = tk.Label(
             status_frame,
             text="Connecting to MQTT broker...",
-            font=('Arial', 10),
+            font=self.fonts['body'],
             bg='#34495e',
             fg='#ffffff'
         )
@@ -231,7 +397,7 @@ class MonitorGUI:
         sector_label = tk.Label(
             header,
             text=sector_name.upper(),
-            font=('Arial', 14, 'bold'),
+            font=self.fonts['header'],
             bg='#34495e',
             fg=COLORS['text_light']
         )
@@ -247,60 +413,66 @@ class MonitorGUI:
         circle = canvas.create_oval(10, 10, 70, 70, fill=COLORS['inactive'], outline='')
         
         # Risk level text
+        risk_var = tk.StringVar(value="INACTIVE")
         risk_label = tk.Label(
             content,
-            text="INACTIVE",
-            font=('Arial', 12, 'bold'),
+            textvariable=risk_var,
+            font=self.fonts['risk'],
             bg=COLORS['bg_light'],
             fg=COLORS['text_dark']
         )
         risk_label.pack(pady=5)
         
         # Sensor count
+        sensor_count_var = tk.StringVar(value="No sensors")
         sensor_count_label = tk.Label(
             content,
-            text="No sensors",
-            font=('Arial', 10),
+            textvariable=sensor_count_var,
+            font=self.fonts['body'],
             bg=COLORS['bg_light'],
             fg=COLORS['text_dark']
         )
         sensor_count_label.pack(pady=2)
         
         # Sensitivity info
+        sensitivity_var = tk.StringVar(value="")
         sensitivity_label = tk.Label(
             content,
-            text="",
-            font=('Arial', 8),
+            textvariable=sensitivity_var,
+            font=self.fonts['small'],
             bg=COLORS['bg_light'],
             fg=COLORS['text_dark']
         )
         sensitivity_label.pack(pady=1)
         
         # Failures info
+        failures_var = tk.StringVar(value="")
         failures_label = tk.Label(
             content,
-            text="",
-            font=('Arial', 8),
+            textvariable=failures_var,
+            font=self.fonts['small'],
             bg=COLORS['bg_light'],
             fg=COLORS['text_dark']
         )
         failures_label.pack(pady=1)
         
         # Disagreement indicator
+        disagreement_var = tk.StringVar(value="")
         disagreement_label = tk.Label(
             content,
-            text="",
-            font=('Arial', 9, 'bold'),
+            textvariable=disagreement_var,
+            font=self.fonts['indicator'],
             bg=COLORS['bg_light'],
             fg=COLORS['alert']
         )
         disagreement_label.pack(pady=2)
         
         # Alert indicator
+        alert_var = tk.StringVar(value="")
         alert_label = tk.Label(
             content,
-            text="",
-            font=('Arial', 9, 'bold'),
+            textvariable=alert_var,
+            font=self.fonts['indicator'],
             bg=COLORS['bg_light'],
             fg=COLORS['alert']
         )
@@ -315,31 +487,20 @@ class MonitorGUI:
         panel.failures_label = failures_label
         panel.disagreement_label = disagreement_label
         panel.alert_label = alert_label
+        panel.vars = {
+            'risk': risk_var,
+            'sensor_count': sensor_count_var,
+            'sensitivity': sensitivity_var,
+            'failures': failures_var,
+            'disagreement': disagreement_var,
+            'alert': alert_var,
+        }
+        
+        # Last (text, fg) applied to each label (see _set)
+        panel._last = {}
         
         return panel
         
-    def get_risk_color(self, risk: float) -> str:
-        """Get color based on risk level."""
-        if risk < 0.3:
-            return COLORS['safe']
-        elif risk < 0.6:
-            return COLORS['low']
-        elif risk < 0.8:
-            return COLORS['warning']
-        else:
-            return COLORS['critical']
-            
-    def get_risk_text(self, risk: float) -> str:
-        """Get text description of risk level."""
-        if risk < 0.3:
-            return "SAFE"
-        elif risk < 0.6:
-            return "LOW RISK"
-        elif risk < 0.8:
-            return "WARNING"
-        else:
-            return "CRITICAL"
-            
     def update_sector_panel(self, sector_name: str):
         """Update the visual state of a sector panel."""
         if sector_name not in self.sector_panels:
@@ -348,80 +509,87 @@ class MonitorGUI:
         panel = self.sector_panels[sector_name]
         sector = self.sectors[sector_name]
         
-        # Cleanup stale data
-        sector.cleanup_stale_data()
+        sector.dirty = False
         
         # Update based on sector state
         if not sector.is_active():
             # Inactive sector
-            panel.canvas.itemconfig(panel.circle, fill=COLORS['inactive'])
-            panel.risk_label.config(text="INACTIVE", fg=COLORS['text_dark'])
-            panel.sensor_count_label.config(text="No sensors", fg=COLORS['text_dark'])
-            panel.sensitivity_label.config(text="")
-            panel.failures_label.config(text="")
-            panel.disagreement_label.config(text="")
-            panel.alert_label.config(text="")
+            if panel._last.get('circle') != COLORS['inactive']:
+                panel.canvas.itemconfig(panel.circle, fill=COLORS['inactive'])
+                panel._last['circle'] = COLORS['inactive']
+            _set(panel, 'risk', panel.risk_label, text="INACTIVE", fg=COLORS['text_dark'])
+            _set(panel, 'sensor_count', panel.sensor_count_label, text=_sensor_count_text(0), fg=COLORS['text_dark'])
+            _set(panel, 'sensitivity', panel.sensitivity_label, text="")
+            _set(panel, 'failures', panel.failures_label, text="")
+            _set(panel, 'disagreement', panel.disagreement_label, text="")
+            _set(panel, 'alert', panel.alert_label, text="")
         else:
             # Active sector
             avg_risk = sector.get_average_risk()
-            risk_color = self.get_risk_color(avg_risk)
-            risk_text = self.get_risk_text(avg_risk)
+            risk_color, risk_text = _classify_risk(int(avg_risk * 100))
             
             # Update circle color
-            panel.canvas.itemconfig(panel.circle, fill=risk_color)
+            if panel._last.get('circle') != risk_color:
+                panel.canvas.itemconfig(panel.circle, fill=risk_color)
+                panel._last['circle'] = risk_color
             
             # Update risk label
-            panel.risk_label.config(
-                text=f"{risk_text}\n{avg_risk:.2f}",
-                fg=COLORS['text_dark']
-            )
+            _set(panel, 'risk', panel.risk_label,
+                 text=f"{risk_text}\n{avg_risk:.2f}",
+                 fg=COLORS['text_dark'])
             
             # Update sensor count
-            num_sensors = len(sector.active_sensors)
-            sensor_text = f"{num_sensors} sensor{'s' if num_sensors > 1 else ''}"
-            panel.sensor_count_label.config(text=sensor_text, fg=COLORS['text_dark'])
+            sensor_text = _sensor_count_text(len(sector.sensors))
+            _set(panel, 'sensor_count', panel.sensor_count_label, text=sensor_text, fg=COLORS['text_dark'])
             
             # Update sensitivity info (average across sensors)
-            if sector.sensor_sensitivity:
-                avg_sensitivity = sum(sector.sensor_sensitivity.values()) / len(sector.sensor_sensitivity)
+            avg_sensitivity = sector.get_average_sensitivity()
+            if avg_sensitivity is not None:
                 sensitivity_text = f"Sensitivity: {avg_sensitivity:.2f}"
-                panel.sensitivity_label.config(text=sensitivity_text, fg=COLORS['text_dark'])
+                _set(panel, 'sensitivity', panel.sensitivity_label, text=sensitivity_text, fg=COLORS['text_dark'])
             else:
-                panel.sensitivity_label.config(text="")
+                _set(panel, 'sensitivity', panel.sensitivity_label, text="")
             
             # Update failures info (total across sensors)
-            if sector.sensor_failures:
-                total_failures = sum(sector.sensor_failures.values())
-                failures_text = f"Failures: {total_failures}"
-                panel.failures_label.config(text=failures_text, fg=COLORS['text_dark'])
+            if sector.failures_count:
+                failures_text = f"Failures: {sector.failures_total}"
+                _set(panel, 'failures', panel.failures_label, text=failures_text, fg=COLORS['text_dark'])
             else:
-                panel.failures_label.config(text="")
+                _set(panel, 'failures', panel.failures_label, text="")
             
             # Check for disagreement
             if sector.has_disagreement():
-                panel.disagreement_label.config(text="[!] DISAGREEMENT")
+                _set(panel, 'disagreement', panel.disagreement_label, text="[!] DISAGREEMENT")
             else:
-                panel.disagreement_label.config(text="")
+                _set(panel, 'disagreement', panel.disagreement_label, text="")
                 
             # Check for alerts
-            if sector.has_alerts():
-                alert_text = f"[ALERT] {len(sector.alerts)} ALERT{'S' if len(sector.alerts) > 1 else ''}"
-                panel.alert_label.config(text=alert_text)
-            else:
-                panel.alert_label.config(text="")
+            _set(panel, 'alert', panel.alert_label, text=_alert_count_text(len(sector.alerts)))
                 
     def update_ui(self):
         """Periodic UI update (called every 500ms)."""
-        # Update all sector panels
-        for sector_name in self.sectors.keys():
-            self.update_sector_panel(sector_name)
-            
-        # Update status bar
-        total_sensors = sum(len(s.active_sensors) for s in self.sectors.values())
-        total_alerts = sum(len(s.alerts) for s in self.sectors.values())
+        now = time.monotonic()
+        
+        # Apply messages received since the last tick
+        self._drain_ingest(now)
         
-        status_text = f"[OK] Connected | Active Sensors: {total_sensors} | Active Alerts: {total_alerts}"
-        self.status_label.config(text=status_text)
+        # Cleanup stale data on a coarser cadence
+        if now - self.last_cleanup >= CLEANUP_INTERVAL:
+            for sector in self.sectors.values():
+                self.total_sensors += sector.cleanup_stale_data(now)
+            self.last_cleanup = now
+        
+        # Repaint only the sector panels whose state changed
+        for sector_name in self.sector_names:
+            if self.sectors[sector_name].dirty:
+                self.update_sector_panel(sector_name)
+            
+        # Update status bar only when the totals changed
+        totals = (self.total_sensors, self.total_alerts)
+        if totals != self.status_totals:
+            status_text = f"[OK] Connected | Active Sensors: {self.total_sensors} | Active Alerts: {self.total_alerts}"
+            self.status_label.config(text=status_text)
+            self.status_totals = totals
         
         # Schedule next update
         self.root.after(500, self.update_ui)
@@ -429,71 +597,87 @@ class MonitorGUI:
     def on_connect(self, client, userdata, flags, rc):
         """MQTT connection callback."""
         if rc == 0:
-            print("[OK] GUI connected to MQTT broker")
+            logger.info("GUI connected to MQTT broker")
             
             # Subscribe to relevant topics
             self.client.subscribe("weather/belief/#", qos=1)
             self.client.subscribe("weather/alert/#", qos=1)
             self.client.subscribe("weather/status/#", qos=1)
-            
-            print("[OK] Subscribed to belief, alert, and status topics")
         else:
-            print(f"[ERROR] Connection failed with code {rc}")
+            logger.error("Connection failed with code %s", rc)
             
-    def on_message(self, client, userdata, msg):
-        """MQTT message callback."""
-        topic = msg.topic
+    def _on_belief(self, client, userdata, msg):
+        """MQTT callback for weather/belief/# (network thread)."""
+        self.state_queue.put_nowait((self._handle_belief, msg.topic, msg.payload))
         
-        try:
-            # Parse topic to extract sector and sensor info
-            parts = topic.split('/')
+    def _on_alert(self, client, userdata, msg):
+        """MQTT callback for weather/alert/# (network thread)."""
+        self.alert_queue.put_nowait((self._handle_alert, msg.topic, msg.payload))
+        
+    def _on_status(self, client, userdata, msg):
+        """MQTT callback for weather/status/# (network thread)."""
+        self.state_queue.put_nowait((self._handle_status, msg.topic, msg.payload))
+        
+    def _drain_ingest(self, now: float, max_items: int = 512):
+        """
+        Process up to max_items queued MQTT messages on the Tk thread.
+        The alert queue is served first, so a burst of beliefs cannot
+        delay alerts to a later tick; beliefs and status follow in arrival
+        order.
+        """
+        budget = max_items
+        for ingest_queue in self._ingest_order:
+            while budget:
+                try:
+                    handler, topic, raw_payload = ingest_queue.get_nowait()
+                except queue.Empty:
+                    break
+                self.process_message(handler, topic, raw_payload, now)
+                budget -= 1
             
-            if len(parts) < 4:
+    def process_message(self, handler, topic: str, raw_payload: bytes, now: float):
+        """Parse one MQTT message and apply it to the sector state."""
+        try:
+            parsed = _parse_topic(topic)
+            if parsed is None:
                 return
-                
-            topic_type = parts[1]  # belief, alert, or status
-            sector = parts[2]      # sector name
-            sensor_id = parts[4] if len(parts) > 4 else None
+            sector, sensor_id = parsed
             
             # Only process if it's a known sector
             if sector not in self.sectors:
                 return
                 
-            payload = json.loads(msg.payload.decode())
-            
-            # Handle different message types
-            if topic_type == "belief":
-                # Update sensor belief (including sensitivity and failures if available)
-                risk = payload.get("local_risk", 0.0)
-                sensitivity = payload.get("sensitivity")
-                false_alarms = payload.get("false_alarm_count")
-                missed_events = payload.get("missed_event_count")
-                if sensor_id:
-                    self.sectors[sector].add_belief(sensor_id, risk, sensitivity, 
-                                                   false_alarms, missed_events)
-                    
-            elif topic_type == "alert":
-                # Add alert to sector
-                self.sectors[sector].add_alert(payload)
-                
-            elif topic_type == "status":
-                # Update sensor status
-                status = payload.get("status", "unknown")
-                if sensor_id:
-                    self.sectors[sector].update_status(sensor_id, status)
+            payload = json_loads(raw_payload)
+            handler(self.sectors[sector], sensor_id, payload, now)
                     
-        except Exception as e:
-            print(f"[ERROR] Error processing message from {topic}: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Error processing message from %s", topic)
             
-    def mqtt_loop(self):
-        """Run MQTT client loop in background thread."""
-        try:
-            self.client.connect(self.broker, self.port, keepalive=60)
-            self.client.loop_forever()
-        except Exception as e:
-            print(f"[ERROR] MQTT connection error: {e}")
+    def _handle_belief(self, sector: SectorState, sensor_id: Optional[str], payload: Dict, now: float):
+        """Update sensor belief (including sensitivity and failures if available)."""
+        if sensor_id:
+            self.total_sensors += sector.add_belief(
+                sensor_id,
+                payload.get("local_risk", 0.0),
+                now,
+                payload.get("sensitivity"),
+                payload.get("false_alarm_count"),
+                payload.get("missed_event_count"))
+            
+    def _handle_alert(self, sector: SectorState, sensor_id: Optional[str], payload: Dict, now: float):
+        """Add alert to sector."""
+        self.total_alerts += sector.add_alert(payload, now)
+        
+    def _handle_status(self, sector: SectorState, sensor_id: Optional[str], payload: Dict, now: float):
+        """Update sensor online/offline status."""
+        if sensor_id:
+            self.total_sensors += sector.update_status(sensor_id, payload.get("status", "unknown"))
+            
+    def on_close(self):
+        """Stop the MQTT network thread and close the window."""
+        self.client.disconnect()
+        self.client.loop_stop()
+        self.root.destroy()
             
     def run(self):
         """Start the GUI application."""
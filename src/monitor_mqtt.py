@@ -149,7 +149,7 @@ class WeatherMonitor:
             payload: JSON payload with measurements
         """
         try:
-            data = json.loads(payload.decode('utf-8'))
+            data = json.loads(payload)
             sensor_id = data.get("sensor_id")
             
             # Store latest data
@@ -180,7 +180,7 @@ class WeatherMonitor:
             payload: JSON with sensor_id, status, timestamp
         """
         try:
-            data = json.loads(payload.decode('utf-8'))
+            data = json.loads(payload)
             sensor_id = data.get("sensor_id")
             status = data.get("status", "unknown")
             
@@ -248,7 +248,7 @@ class WeatherMonitor:
             payload: Alert information
         """
         try:
-            data = json.loads(payload.decode('utf-8'))
+            data = json.loads(payload)
             sensor_id = data.get("sensor_id")
             risk_level = data.get("risk_level", 0.0)
             message = data.get("message", "")
@@ -286,7 +286,7 @@ class WeatherMonitor:
             payload: Belief information
         """
         try:
-            belief = json.loads(payload.decode('utf-8'))
+            belief = json.loads(payload)
             sensor_id = belief.get("sensor_id")
             local_risk = belief.get("local_risk", 0.0)
             risk_level = belief.get("risk_level", "unknown")
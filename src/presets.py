@@ -1,5 +1,7 @@
 # src/common/presets.py
-import os, random, time
+import logging, os, random, time
+
+logger = logging.getLogger(__name__)
 
 SEED = os.getenv("SEED")
 if SEED is not None:
@@ -18,18 +20,26 @@ MEASURE_RANGES = {
 }
 
 def make_sensor_id(sensor_type: str) -> str:
+    """Returns an id like 'meteo-04217-583' (ms clock bits + random suffix)."""
+    ms = time.monotonic_ns() // 1_000_000
+    return f"{sensor_type}-{ms % 100000:05d}-{random.randrange(100, 1000)}"
 
-    suffix = f"{int(time.time()*1000)%100000}-{random.randint(100,999)}"
-    return f"{sensor_type}-{suffix}"
+# Per sensor type: (key, min, max, is_decimal) built once from MEASURE_RANGES.
+# Temperature and pressure keep one decimal, everything else is an integer.
+_SAMPLING_PLAN = {
+    sensor_type: tuple(
+        (k, lo, hi, "temperature" in k or "pressure" in k)
+        for k, (lo, hi) in ranges.items()
+    )
+    for sensor_type, ranges in MEASURE_RANGES.items()
+}
 
 def sample_measurements(sensor_type: str) -> dict:
     """Returns a dict with sample measurements for the given sensor type."""
-    ranges = MEASURE_RANGES.get(sensor_type, {})
-    out = {}
-    for k, (min, max) in ranges.items():
-        if "temperature" in k or "pressure" in k:
-            out[k] = round(random.uniform(min, max), 1)
-        else:
-            out[k] = int(random.uniform(min, max))
-    print(f"Sampled measurements for {sensor_type}: {out}")
+    uniform = random.uniform
+    out = {
+        k: round(uniform(lo, hi), 1) if is_decimal else int(uniform(lo, hi))
+        for k, lo, hi, is_decimal in _SAMPLING_PLAN.get(sensor_type, ())
+    }
+    logger.debug("Sampled measurements for %s: %s", sensor_type, out)
     return out
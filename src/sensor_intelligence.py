@@ -11,14 +11,92 @@ Each sensor has:
 - Learning from feedback
 """
 
-from collections import deque
-from typing import Dict, List, Optional
-import statistics
+from array import array
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence, Tuple
 import logging
 import random
 
 logger = logging.getLogger(__name__)
 
+# Feedback types understood by SensorBrain.process_feedback
+FB_FALSE_ALARM = 0
+FB_MISSED = 1
+FB_CORRECT = 2
+
+# Wire names used in feedback messages -> feedback type
+FEEDBACK_TYPES = {
+    "false_alarm": FB_FALSE_ALARM,
+    "missed_event": FB_MISSED,
+    "correct": FB_CORRECT,
+}
+
+# Detector thresholds, applied in _risk_factors
+PRESSURE_DROP_HPA = 5.0      # drop over the last 3 samples
+ICE_TEMP = 2.0               # ice risk: colder than this ...
+ICE_HUMIDITY = 80.0          # ... and more humid than this
+EXTREME_TEMP_LOW = -10.0
+EXTREME_TEMP_HIGH = 35.0
+EXTREME_PRESSURE_LOW = 970.0
+
+# Minimum neighbor average risk for a consensus alert
+CONSENSUS_THRESHOLD = 0.4
+
+# Risk label boundaries: below 0.3 is stable, below 0.6 moderate, below 0.8 high
+_RISK_LABEL_BOUNDS = (0.3, 0.6, 0.8)
+RISK_LABELS = ("stable", "moderate", "high", "critical")
+
+
+def _risk_factors(temp_buf: array, pressure_buf: array, humidity_buf: array,
+                  write_idx: int, count: int) -> Tuple[float, bool, bool, bool, bool]:
+    """
+    Evaluate the detector rules on the latest sample in the ring buffers.
+    
+    This is the single definition of the rules; _compute_risk and the
+    SensorBrain.detect_* methods are built on it.
+    
+    write_idx is always in [0, len), so write_idx - k for k <= count is a
+    valid (possibly negative) index and wraps without a modulo.
+    
+    Returns:
+        (drop, pressure_drop, ice, extreme_temp, low_pressure): the pressure
+        drop in hPa over the last 3 samples (0.0 with fewer samples) and
+        whether each rule fired. All False when the buffers are empty.
+    """
+    if not count:
+        return 0.0, False, False, False, False
+    
+    t = temp_buf[write_idx - 1]
+    p = pressure_buf[write_idx - 1]
+    h = humidity_buf[write_idx - 1]
+    drop = pressure_buf[write_idx - 3] - p if count >= 3 else 0.0
+    
+    return (drop,
+            drop > PRESSURE_DROP_HPA,
+            t < ICE_TEMP and h > ICE_HUMIDITY,
+            t < EXTREME_TEMP_LOW or t > EXTREME_TEMP_HIGH,
+            p < EXTREME_PRESSURE_LOW)
+
+
+def _compute_risk(temp_buf: array, pressure_buf: array, humidity_buf: array,
+                  write_idx: int, count: int,
+                  sensitivity: float) -> Tuple[float, Tuple[float, bool, bool, bool, bool]]:
+    """
+    Risk score for the latest sample in the ring buffers.
+    
+    Weighs the _risk_factors rules: rapid pressure drop (0.4), ice risk (0.3)
+    and extreme values (0.3), scaled by sensitivity and capped at 1.0.
+    
+    Returns:
+        (risk, factors), where factors is the _risk_factors tuple the score
+        was computed from (for logging which rules fired)
+    """
+    factors = _risk_factors(temp_buf, pressure_buf, humidity_buf, write_idx, count)
+    _, pressure_drop, ice, extreme_temp, low_pressure = factors
+    
+    risk = 0.4 * pressure_drop + 0.3 * ice + 0.3 * (extreme_temp or low_pressure)
+    return min(1.0, risk * sensitivity), factors
+
 
 class SensorBrain:
     """
@@ -26,6 +104,19 @@ class SensorBrain:
     Manages state, detects trends, calculates risk, learns from feedback.
     """
     
+    # Per-measurement debug logs are emitted once every this many samples
+    LOG_EVERY = 100
+    
+    __slots__ = (
+        "sensor_id", "history_size",
+        "temp_buf", "pressure_buf", "humidity_buf", "_write_idx", "_count",
+        "neighbor_beliefs",
+        "local_risk", "risk_threshold",
+        "sensitivity", "false_alarm_count", "missed_event_count",
+        "active_neighbors_count", "base_interval", "_interval_base", "_interval_table",
+        "_summary_dirty", "_summary", "_measure_tick", "_was_alerting",
+    )
+    
     def __init__(self, sensor_id: str, history_size: int = 10):
         """
         Initialize the sensor brain.
@@ -37,10 +128,13 @@ class SensorBrain:
         self.sensor_id = sensor_id
         self.history_size = history_size
         
-        # Internal state - recent history
-        self.temp_history = deque(maxlen=history_size)
-        self.pressure_history = deque(maxlen=history_size)
-        self.humidity_history = deque(maxlen=history_size)
+        # Internal state - recent history, as preallocated ring buffers.
+        # _write_idx is the next slot to write; _count is how many are filled.
+        self.temp_buf = array('d', [0.0]) * history_size
+        self.pressure_buf = array('d', [0.0]) * history_size
+        self.humidity_buf = array('d', [0.0]) * history_size
+        self._write_idx = 0
+        self._count = 0
         
         # Neighbor beliefs (from other sensors in same site)
         self.neighbor_beliefs: Dict[str, float] = {}  # {sensor_id: risk_level}
@@ -57,8 +151,28 @@ class SensorBrain:
         # Coordination state
         self.active_neighbors_count = 0
         self.base_interval = 5  # Base publishing interval
+        self._interval_base: Optional[int] = None  # base the table was built for
+        self._interval_table: List[int] = []
+        
+        # Memoized belief summary - refreshed in place only after state changes
+        self._summary_dirty = True
+        self._summary: Dict = {
+            "sensor_id": sensor_id,
+            "local_risk": 0.0,
+            "risk_level": "stable",
+            "neighbor_count": 0,
+            "neighbor_avg_risk": None,
+            "sensitivity": 1.0,
+            "false_alarm_count": 0,
+            "missed_event_count": 0,
+            "would_alert": False,
+        }
+        
+        # Logging state: sample counter and last alert decision (for edges)
+        self._measure_tick = 0
+        self._was_alerting = False
         
-        logger.info(f"SensorBrain initialized for {sensor_id} with sensitivity={self.sensitivity:.2f}")
+        logger.info("SensorBrain initialized for %s with sensitivity=%.2f", sensor_id, self.sensitivity)
     
     def add_measurement(self, temp: float, pressure: float, humidity: float):
         """
@@ -69,11 +183,68 @@ class SensorBrain:
             pressure: Pressure in hPa
             humidity: Humidity percentage
         """
-        self.temp_history.append(temp)
-        self.pressure_history.append(pressure)
-        self.humidity_history.append(humidity)
+        i = self._write_idx
+        self.temp_buf[i] = temp
+        self.pressure_buf[i] = pressure
+        self.humidity_buf[i] = humidity
+        self._write_idx = (i + 1) % self.history_size
+        if self._count < self.history_size:
+            self._count += 1
+        self._summary_dirty = True
+        
+        self._measure_tick += 1
+        if self._measure_tick % self.LOG_EVERY == 0 and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s: Added measurement - T:%s°C P:%shPa H:%s%%", self.sensor_id, temp, pressure, humidity)
+    
+    def add_measurements_batch(self, temps: Sequence[float], pressures: Sequence[float],
+                               humidities: Sequence[float]):
+        """
+        Add several measurements at once, oldest first.
+        
+        Equivalent to calling add_measurement for each sample in order, but
+        copies into the ring buffers with slice assignments. Only the last
+        history_size samples can survive, so earlier ones are skipped.
+        
+        Args:
+            temps: Temperatures in Celsius
+            pressures: Pressures in hPa
+            humidities: Humidity percentages
         
-        logger.debug(f"{self.sensor_id}: Added measurement - T:{temp}°C P:{pressure}hPa H:{humidity}%")
+        Raises:
+            ValueError: If the three sequences differ in length
+        """
+        k = len(temps)
+        if len(pressures) != k or len(humidities) != k:
+            raise ValueError(
+                f"{self.sensor_id}: batch length mismatch - temps:{k} "
+                f"pressures:{len(pressures)} humidities:{len(humidities)}"
+            )
+        if not k:
+            return
+        
+        n = self.history_size
+        m = min(k, n)
+        start = (self._write_idx + k - m) % n
+        first = min(m, n - start)  # samples that fit before wrapping
+        
+        for buf, values in ((self.temp_buf, temps), (self.pressure_buf, pressures),
+                            (self.humidity_buf, humidities)):
+            tail = values[k - m:]
+            buf[start:start + first] = array('d', tail[:first])
+            if first < m:
+                buf[:m - first] = array('d', tail[first:])
+        
+        self._write_idx = (start + m) % n
+        self._count = min(n, self._count + k)
+        self._summary_dirty = True
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s: Added %d measurements", self.sensor_id, k)
+    
+    def _latest_factors(self) -> Tuple[float, bool, bool, bool, bool]:
+        """_risk_factors for this sensor's buffers."""
+        return _risk_factors(self.temp_buf, self.pressure_buf, self.humidity_buf,
+                             self._write_idx, self._count)
     
     def detect_pressure_drop(self) -> bool:
         """
@@ -82,17 +253,10 @@ class SensorBrain:
         Returns:
             True if rapid drop detected
         """
-        if len(self.pressure_history) < 3:
-            return False
-        
-        # Check if pressure dropped more than 5 hPa in recent measurements
-        recent = list(self.pressure_history)[-3:]
-        drop = recent[0] - recent[-1]
-        
-        if drop > 5:
-            logger.warning(f"{self.sensor_id}: Rapid pressure drop detected: {drop:.1f} hPa")
-            return True
-        return False
+        drop, pressure_drop, _, _, _ = self._latest_factors()
+        if pressure_drop:
+            logger.warning("%s: Rapid pressure drop detected: %.1f hPa", self.sensor_id, drop)
+        return pressure_drop
     
     def detect_high_humidity_low_temp(self) -> bool:
         """
@@ -101,16 +265,12 @@ class SensorBrain:
         Returns:
             True if risky combination detected
         """
-        if not self.temp_history or not self.humidity_history:
-            return False
-        
-        current_temp = self.temp_history[-1]
-        current_humidity = self.humidity_history[-1]
-        
-        if current_temp < 2 and current_humidity > 80:
-            logger.warning(f"{self.sensor_id}: Ice risk - T:{current_temp}°C H:{current_humidity}%")
-            return True
-        return False
+        ice = self._latest_factors()[2]
+        if ice:
+            last = self._write_idx - 1
+            logger.warning("%s: Ice risk - T:%s°C H:%s%%", self.sensor_id,
+                           self.temp_buf[last], self.humidity_buf[last])
+        return ice
     
     def detect_extreme_values(self) -> bool:
         """
@@ -119,23 +279,14 @@ class SensorBrain:
         Returns:
             True if extreme values detected
         """
-        if not self.temp_history or not self.pressure_history:
-            return False
-        
-        current_temp = self.temp_history[-1]
-        current_pressure = self.pressure_history[-1]
-        
-        # Extreme temperature
-        if current_temp < -10 or current_temp > 35:
-            logger.warning(f"{self.sensor_id}: Extreme temperature: {current_temp}°C")
-            return True
-        
-        # Extreme pressure (very low = storm)
-        if current_pressure < 970:
-            logger.warning(f"{self.sensor_id}: Very low pressure: {current_pressure} hPa")
-            return True
-        
-        return False
+        _, _, _, extreme_temp, low_pressure = self._latest_factors()
+        last = self._write_idx - 1
+        if extreme_temp:
+            logger.warning("%s: Extreme temperature: %s°C", self.sensor_id, self.temp_buf[last])
+        elif low_pressure:
+            # Extreme pressure (very low = storm)
+            logger.warning("%s: Very low pressure: %s hPa", self.sensor_id, self.pressure_buf[last])
+        return extreme_temp or low_pressure
     
     def calculate_local_risk(self) -> float:
         """
@@ -144,28 +295,25 @@ class SensorBrain:
         Returns:
             Risk level between 0.0 (safe) and 1.0 (high risk)
         """
-        if len(self.temp_history) < 2:
+        if self._count < 2:
             return 0.0
         
-        risk = 0.0
-        
-        # Factor 1: Pressure drop (0.0 - 0.4)
-        if self.detect_pressure_drop():
-            risk += 0.4
-        
-        # Factor 2: High humidity + low temp (0.0 - 0.3)
-        if self.detect_high_humidity_low_temp():
-            risk += 0.3
+        # Sensitivity multiplier (learning) is applied inside _compute_risk
+        risk, factors = _compute_risk(self.temp_buf, self.pressure_buf, self.humidity_buf,
+                                      self._write_idx, self._count, self.sensitivity)
         
-        # Factor 3: Extreme values (0.0 - 0.3)
-        if self.detect_extreme_values():
-            risk += 0.3
-        
-        # Apply sensitivity multiplier (learning)
-        risk = min(1.0, risk * self.sensitivity)
+        if risk:
+            drop, pressure_drop, ice, extreme_temp, low_pressure = factors
+            last = self._write_idx - 1
+            logger.warning("%s: Risk factors - pressure drop:%s (%.1f hPa) ice:%s extreme temp:%s "
+                           "low pressure:%s - risk:%.2f T:%s°C P:%shPa H:%s%%",
+                           self.sensor_id, pressure_drop, drop, ice, extreme_temp, low_pressure, risk,
+                           self.temp_buf[last], self.pressure_buf[last], self.humidity_buf[last])
         
         self.local_risk = risk
-        logger.debug(f"{self.sensor_id}: Local risk calculated: {risk:.2f}")
+        self._summary_dirty = True
+        if self._measure_tick % self.LOG_EVERY == 0 and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s: Local risk calculated: %.2f", self.sensor_id, risk)
         
         return risk
     
@@ -178,7 +326,9 @@ class SensorBrain:
             neighbor_risk: Risk level reported by neighbor
         """
         self.neighbor_beliefs[neighbor_id] = neighbor_risk
-        logger.debug(f"{self.sensor_id}: Updated belief from {neighbor_id}: risk={neighbor_risk:.2f}")
+        self._summary_dirty = True
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s: Updated belief from %s: risk=%.2f", self.sensor_id, neighbor_id, neighbor_risk)
     
     def get_neighbors_average_risk(self) -> Optional[float]:
         """
@@ -190,8 +340,7 @@ class SensorBrain:
         if not self.neighbor_beliefs:
             return None
         
-        avg = statistics.mean(self.neighbor_beliefs.values())
-        return avg
+        return sum(self.neighbor_beliefs.values()) / len(self.neighbor_beliefs)
     
     def should_alert(self) -> bool:
         """
@@ -202,24 +351,33 @@ class SensorBrain:
         Returns:
             True if alert should be generated
         """
-        # First check: local risk must be significant
+        return self._decide_alert(self.get_neighbors_average_risk())
+    
+    def _decide_alert(self, neighbor_avg: Optional[float]) -> bool:
+        """should_alert with the neighbor average already computed."""
         if self.local_risk < self.risk_threshold:
-            return False
-        
-        # If no neighbors, decide alone
-        neighbor_avg = self.get_neighbors_average_risk()
-        if neighbor_avg is None:
-            logger.info(f"{self.sensor_id}: High local risk ({self.local_risk:.2f}), no neighbors - ALERTING")
-            return True
-        
-        # Consensus rule: alert only if neighbors also see elevated risk
-        consensus_threshold = 0.4
-        if neighbor_avg >= consensus_threshold:
-            logger.info(f"{self.sensor_id}: Consensus reached - Local:{self.local_risk:.2f} Neighbors:{neighbor_avg:.2f} - ALERTING")
-            return True
+            # First check: local risk must be significant
+            alert = False
+        elif neighbor_avg is None:
+            # If no neighbors, decide alone
+            alert = True
         else:
-            logger.info(f"{self.sensor_id}: No consensus - Local:{self.local_risk:.2f} Neighbors:{neighbor_avg:.2f} - NOT alerting")
-            return False
+            # Consensus rule: alert only if neighbors also see elevated risk
+            alert = neighbor_avg >= CONSENSUS_THRESHOLD
+        
+        # Only log when the decision flips
+        if alert != self._was_alerting:
+            self._was_alerting = alert
+            if self.local_risk < self.risk_threshold:
+                logger.info("%s: Local risk (%.2f) below threshold - NOT alerting", self.sensor_id, self.local_risk)
+            elif neighbor_avg is None:
+                logger.info("%s: High local risk (%.2f), no neighbors - ALERTING", self.sensor_id, self.local_risk)
+            elif alert:
+                logger.info("%s: Consensus reached - Local:%.2f Neighbors:%.2f - ALERTING", self.sensor_id, self.local_risk, neighbor_avg)
+            else:
+                logger.info("%s: No consensus - Local:%.2f Neighbors:%.2f - NOT alerting", self.sensor_id, self.local_risk, neighbor_avg)
+        
+        return alert
     
     def calculate_adaptive_interval(self, base_interval: int) -> int:
         """
@@ -233,70 +391,75 @@ class SensorBrain:
         Returns:
             Adjusted interval in seconds
         """
+        if base_interval != self._interval_base:
+            self._build_interval_table(base_interval)
         
-        if self.active_neighbors_count <= 2:
-            # Few neighbors, normal frequency
-            return base_interval
-        
-        elif self.active_neighbors_count <= 5:
-            # Several neighbors, slightly reduce frequency
-            return int(base_interval * 1.5)
-        
-        else:
-            # Many neighbors, reduce frequency significantly
-            return int(base_interval * 2)
+        table = self._interval_table
+        return table[min(self.active_neighbors_count, len(table) - 1)]
+    
+    def _build_interval_table(self, base_interval: int):
+        """Precompute the adaptive interval for each neighbor count bucket."""
+        self._interval_table = (
+            [base_interval] * 3               # 0-2 neighbors: normal frequency
+            + [int(base_interval * 1.5)] * 3  # 3-5 neighbors: slightly reduced
+            + [int(base_interval * 2)]        # 6+ neighbors: significantly reduced
+        )
+        self._interval_base = base_interval
     
-    def process_feedback(self, feedback_type: str):
+    def process_feedback(self, feedback_type: int):
         """
         Learn from feedback provided by the monitor.
         
         Args:
-            feedback_type: 'false_alarm' or 'missed_event' or 'correct'
+            feedback_type: FB_FALSE_ALARM, FB_MISSED or FB_CORRECT
+                (see FEEDBACK_TYPES for the wire names)
         """
-        if feedback_type == "false_alarm":
+        self._summary_dirty = True
+        if feedback_type == FB_FALSE_ALARM:
             self.false_alarm_count += 1
             # Too sensitive, reduce sensitivity (small step)
             self.sensitivity = max(0.5, self.sensitivity - 0.05)
-            logger.info(f"{self.sensor_id}: False alarm feedback - Reducing sensitivity to {self.sensitivity:.2f}")
+            logger.info("%s: False alarm feedback - Reducing sensitivity to %.2f", self.sensor_id, self.sensitivity)
         
-        elif feedback_type == "missed_event":
+        elif feedback_type == FB_MISSED:
             self.missed_event_count += 1
             # Not sensitive enough, increase sensitivity (large step)
             self.sensitivity = min(1.5, self.sensitivity + 0.2)
-            logger.info(f"{self.sensor_id}: Missed event feedback - Increasing sensitivity to {self.sensitivity:.2f}")
+            logger.info("%s: Missed event feedback - Increasing sensitivity to %.2f", self.sensor_id, self.sensitivity)
         
-        elif feedback_type == "correct":
+        elif feedback_type == FB_CORRECT:
             # Good prediction - reinforce and reward with significant boost
             old_sensitivity = self.sensitivity
             self.sensitivity = min(1.5, self.sensitivity + 0.08)
-            logger.info(f"{self.sensor_id}: Correct feedback - Reinforcing good behavior {old_sensitivity:.2f} -> {self.sensitivity:.2f}")
+            logger.info("%s: Correct feedback - Reinforcing good behavior %.2f -> %.2f", self.sensor_id, old_sensitivity, self.sensitivity)
     
     def get_belief_summary(self) -> Dict:
         """
         Get current belief state for publishing.
         
+        The summary is cached until the next measurement, risk update,
+        neighbor belief or feedback. A shallow copy is returned so callers
+        can add fields (e.g. a timestamp) without touching the cache.
+        
         Returns:
             Dictionary with belief information
         """
-        return {
-            "sensor_id": self.sensor_id,
-            "local_risk": round(self.local_risk, 3),
-            "risk_level": self._risk_to_label(self.local_risk),
-            "neighbor_count": len(self.neighbor_beliefs),
-            "neighbor_avg_risk": round(self.get_neighbors_average_risk(), 3) if self.neighbor_beliefs else None,
-            "sensitivity": round(self.sensitivity, 2),
-            "false_alarm_count": self.false_alarm_count,
-            "missed_event_count": self.missed_event_count,
-            "would_alert": self.should_alert()
-        }
+        summary = self._summary
+        if self._summary_dirty:
+            neighbor_avg = self.get_neighbors_average_risk()
+            # Risks and sensitivity are non-negative, so adding 0.5 before
+            # truncating rounds to nearest without going through round()
+            summary["local_risk"] = int(self.local_risk * 1000 + 0.5) / 1000
+            summary["risk_level"] = self._risk_to_label(self.local_risk)
+            summary["neighbor_count"] = len(self.neighbor_beliefs)
+            summary["neighbor_avg_risk"] = int(neighbor_avg * 1000 + 0.5) / 1000 if neighbor_avg is not None else None
+            summary["sensitivity"] = int(self.sensitivity * 100 + 0.5) / 100
+            summary["false_alarm_count"] = self.false_alarm_count
+            summary["missed_event_count"] = self.missed_event_count
+            summary["would_alert"] = self._decide_alert(neighbor_avg)
+            self._summary_dirty = False
+        return summary.copy()
     
     def _risk_to_label(self, risk: float) -> str:
         """Convert risk number to human-readable label."""
-        if risk < 0.3:
-            return "stable"
-        elif risk < 0.6:
-            return "moderate"
-        elif risk < 0.8:
-            return "high"
-        else:
-            return "critical"
+        return RISK_LABELS[bisect_right(_RISK_LABEL_BOUNDS, risk)]
@@ -7,16 +7,49 @@ import sys
 import logging
 import argparse
 import os
+import re
+import socket
+import threading
 from pathlib import Path
 from dotenv import load_dotenv
 from presets import make_sensor_id, sample_measurements, SITES
 from topics import (data_topic, status_topic, belief_topic, belief_site_topic, 
                     alert_topic, feedback_topic, reject_topic, assign_sector_topic)
-from sensor_intelligence import SensorBrain
+from sensor_intelligence import SensorBrain, FEEDBACK_TYPES, RISK_LABELS
+
+try:
+    # Optional C encoder/parser; works on bytes, which paho sends and receives as-is
+    from orjson import dumps as json_dumps, loads as json_loads
+except ImportError:
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+    json_loads = json.loads
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - [SENSOR] - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# A belief is only republished when it changed by more than this much risk,
+# changed label or alert decision, picked up a learning update from feedback
+# (sensitivity or feedback counters), or would be older than the refresh period
+# by the next cycle. Refreshes are therefore always less than BELIEF_REFRESH_S
+# apart, so even with one lost QoS 0 belief the gap stays under the monitor
+# GUI's 30 s stale-sensor timeout.
+BELIEF_RISK_EPSILON = 0.02
+BELIEF_REFRESH_S = 15
+
+# Topic kind for dispatch: weather/<kind>/... or weather/control/<kind>/...
+_TOPIC_KIND_RE = re.compile(r"weather/(?:control/)?(reject|assign|belief|feedback)/")
+
+# Pre-encoded '"risk_level":"<label>",' fragment for each belief risk label
+_RISK_LEVEL_JSON = {label: b'"risk_level":"%s",' % label.encode() for label in RISK_LABELS}
+
+# Fixed-shape status payloads; string fields are filled with pre-encoded
+# JSON strings (see Sensor._id_json / _type_json)
+_STATUS_ONLINE_TMPL = b'{"sensor_id":%s,"status":"online","sensor_type":%s,"timestamp":%d}'
+_STATUS_OFFLINE_TMPL = b'{"sensor_id":%s,"status":"offline","sector":%s,"sensor_type":%s,"timestamp":%d}'
+_STATUS_LWT_TMPL = (b'{"sensor_id":%s,"status":"offline","sector":%s,"sensor_type":%s,'
+                    b'"timestamp":%d,"reason":"connection_lost"}')
+
 
 class Sensor:
     """Class representing a weather sensor."""
@@ -46,24 +79,92 @@ class Sensor:
         self.client.on_connect = self.on_connect
         self.client.on_message = self.on_message
         self.client.on_disconnect = self.on_disconnect
+        self.client.on_socket_open = self.on_socket_open
+        
+        # Allow more unacknowledged QoS 1 messages than paho's default of 20
+        self.client.max_inflight_messages_set(200)
+        
+        # Message handlers keyed by topic kind (see _TOPIC_KIND_RE)
+        self._handlers = {
+            "reject": self._handle_rejection,
+            "assign": self._handle_sector_assignment,
+            "belief": self._handle_neighbor_belief,
+            "feedback": self._handle_feedback,
+        }
 
         # Sensor state
         self.is_connected = False
         self.running = True
+        self._connected_event = threading.Event()  # Set by on_connect on success
+        self._sector_event = threading.Event()  # Set when the sector wait is over (assigned or rejected)
+        self._stop = threading.Event()  # Set on shutdown to wake the publish loop
         
         # DAI - Autonomous Intelligence (The "Brain")
         self.brain = SensorBrain(sensor_id=self.sensor_id, history_size=10)
         self.publish_interval = 5  # Will be adapted dynamically
+        self._cycle_interval = self.publish_interval  # Wait before the next publish_data
+        
+        # Per-sensor topics, recomputed when the monitor assigns a sector
+        self._cache_topics()
+        self._belief_subscription = None  # belief topic currently subscribed
+        
+        # Pre-encoded JSON strings for the payload templates
+        self._id_json = json_dumps(self.sensor_id)
+        self._type_json = json_dumps(self.sensor_type)
+        
+        # Pre-encoded start of every belief payload: '{"sensor_id":"<id>",'
+        self._belief_prefix = b'{"sensor_id":' + self._id_json + b','
+        
+        # Reused payload dicts; their key sets are fixed for this sensor type
+        self._data_payload = {"sensor_id": self.sensor_id, "timestamp": 0}
+        self._alert_payload = {
+            "sensor_id": self.sensor_id,
+            "timestamp": 0,
+            "alert_type": "weather_risk",
+            "risk_level": 0.0,
+            "message": "",
+            "measurements": None,
+        }
+        
+        # Last published belief, to skip republishing unchanged ones
+        self._last_belief_risk = None
+        self._last_belief_state = None  # (risk_level, would_alert, sensitivity, false alarms, missed events)
+        self._last_belief_time = 0
 
         if self.site:
             logger.info(f"Sensor created: {self.sensor_id} (type: {self.sensor_type}, site: {self.site})")
         else:
             logger.info(f"Sensor created: {self.sensor_id} (type: {self.sensor_type}, waiting for sector assignment...)")
 
+    def _cache_topics(self):
+        """Build the topics this sensor publishes on for its current site."""
+        self._data_topic = data_topic(self.site, self.sensor_type, self.sensor_id)
+        self._belief_topic = belief_topic(self.site, self.sensor_type, self.sensor_id)
+        self._alert_topic = alert_topic(self.site, self.sensor_type, self.sensor_id)
+        self._status_topic = status_topic(self.site, self.sensor_type, self.sensor_id)
+        self._belief_site_topic = belief_site_topic(self.site, self.sensor_type)
+
+    def _subscribe_beliefs(self):
+        """Subscribe to neighbor beliefs for the current site, once.
+        
+        Only sends SUBSCRIBE when the site's belief topic differs from the
+        one already subscribed (dropping the old one on a sector change).
+        """
+        topic = self._belief_site_topic
+        if topic == self._belief_subscription:
+            return False
+        if self._belief_subscription is not None:
+            self.client.unsubscribe(self._belief_subscription)
+        self.client.subscribe(topic, qos=0)
+        self._belief_subscription = topic
+        return True
+
     def on_connect(self, client, userdata, flags, rc):
         """Callback when connecting to the broker"""
         if rc == 0:
             self.is_connected = True
+            self._connected_event.set()
+            self._belief_subscription = None  # clean session: nothing subscribed yet
             logger.info(f"{self.sensor_id}: Connected to broker")
             
             # Subscribe to monitor control topics (assignment and rejection)
@@ -72,19 +173,13 @@ class Sensor:
             logger.info(f"{self.sensor_id}: Subscribed to monitor control topics")
             
             # Publish online status (no sector yet, will be assigned by monitor)
-            status_payload = json.dumps({
-                "sensor_id": self.sensor_id,
-                "status": "online",
-                "sensor_type": self.sensor_type,
-                "timestamp": int(time.time())
-            })
+            status_payload = _STATUS_ONLINE_TMPL % (self._id_json, self._type_json, int(time.time()))
             # Use temporary site for topic (will be reassigned)
             temp_site = self.site or "pending"
             self.client.publish(status_topic(temp_site, self.sensor_type, self.sensor_id), status_payload, qos=1)
             
             # If we already have a site, subscribe to neighbor beliefs now
-            if self.site:
-                self.client.subscribe(belief_site_topic(self.site, self.sensor_type), qos=1)
+            if self.site and self._subscribe_beliefs():
                 logger.info(f"{self.sensor_id}: Subscribed to neighbor beliefs at {self.site}")
             
             logger.info(f"{self.sensor_id}: Waiting for sector assignment from monitor...")
@@ -92,35 +187,25 @@ class Sensor:
         else:
             logger.error(f"{self.sensor_id}: Connection error, code {rc}")
 
+    def on_socket_open(self, client, userdata, sock):
+        """Callback when paho opens the broker socket: disable Nagle so small
+        JSON messages go out immediately."""
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except (OSError, AttributeError) as e:
+            logger.debug(f"{self.sensor_id}: Could not set TCP_NODELAY: {e}")
+
     def on_message(self, client, userdata, msg):
-        """Callback when receiving a message"""
-        topic = msg.topic
+        """Callback when receiving a message.
         
-        try:
-            # Handle monitor rejection (maximum priority)
-            if "/reject/" in topic:
-                self._handle_rejection(msg.payload)
-                return
-            
-            # Handle sector assignment from monitor
-            if "/assign/" in topic:
-                self._handle_sector_assignment(msg.payload)
-                return
-            
-            # Check if it's a belief from a neighbor sensor
-            if "/belief/" in topic:
-                self._handle_neighbor_belief(topic, msg.payload)
-            
-            # Check if it's feedback from monitor (for learning)
-            elif "/feedback/" in topic:
-                self._handle_feedback(msg.payload)
-            
-            
-            else:
-                logger.debug(f"{self.sensor_id}: Unhandled message on {topic}")
-                
-        except Exception as e:
-            logger.error(f"{self.sensor_id}: Error processing message from {topic}: {e}")
+        Each handler catches its own parse errors, so no exception handling
+        is needed here.
+        """
+        m = _TOPIC_KIND_RE.match(msg.topic)
+        if m is not None:
+            self._handlers[m.group(1)](msg.payload)
+        else:
+            logger.debug(f"{self.sensor_id}: Unhandled message on {msg.topic}")
     
     def _handle_rejection(self, payload: bytes):
         """
@@ -128,7 +213,7 @@ class Sensor:
         El sensor se apaga automáticamente.
         """
         try:
-            rejection = json.loads(payload.decode())
+            rejection = json_loads(payload)
             reason = rejection.get("reason", "Unknown")
             retry_after = rejection.get("retry_after", 0)
             
@@ -147,16 +232,20 @@ class Sensor:
             
             # Apagar el sensor
             self.running = False
+            self._stop.set()
+            self._sector_event.set()
             self.disconnect()
         
         except Exception as e:
             logger.error(f"Error handling rejection: {e}")
             self.running = False
+            self._stop.set()
+            self._sector_event.set()
             self.disconnect()
     
     def _handle_sector_assignment(self, payload: bytes):
         try:
-            assignment = json.loads(payload.decode())
+            assignment = json_loads(payload)
             assigned_sector = assignment.get("sector")
             
             if not assigned_sector:
@@ -171,23 +260,25 @@ class Sensor:
             
             # Actualizar sector
             self.site = assigned_sector
+            self._cache_topics()
             self.sector_assigned = True
+            self._sector_event.set()
             
             # Now subscribe to belief topics with correct sector
-            self.client.subscribe(belief_site_topic(self.site, self.sensor_type), qos=1)
+            self._subscribe_beliefs()
             self.client.subscribe(feedback_topic(self.site, self.sensor_type, self.sensor_id), qos=1)
             
             logger.info(f"{self.sensor_id}: Subscribed to topics for {self.site}")
-            logger.info(f"{self.sensor_id}: Subscribed to neighbor beliefs: {belief_site_topic(self.site, self.sensor_type)}")
+            logger.info(f"{self.sensor_id}: Subscribed to neighbor beliefs: {self._belief_site_topic}")
             logger.info(f"{self.sensor_id}: Ready to start publishing data")
             
         except Exception as e:
             logger.error(f"Error handling sector assignment: {e}")
     
-    def _handle_neighbor_belief(self, topic: str, payload: bytes):
+    def _handle_neighbor_belief(self, payload: bytes):
         """Process belief published by a neighbor sensor."""
         try:
-            belief_data = json.loads(payload.decode())
+            belief_data = json_loads(payload)
             neighbor_id = belief_data.get("sensor_id")
             
             # Don't process own beliefs
@@ -208,10 +299,10 @@ class Sensor:
     def _handle_feedback(self, payload: bytes):
         """Process feedback from monitor for learning."""
         try:
-            feedback_data = json.loads(payload.decode())
+            feedback_data = json_loads(payload)
             feedback_type = feedback_data.get("type")  # 'false_alarm', 'missed_event', 'correct'
             
-            self.brain.process_feedback(feedback_type)
+            self.brain.process_feedback(FEEDBACK_TYPES.get(feedback_type))
             logger.info(f"{self.sensor_id}: Processed feedback: {feedback_type}")
             
         except Exception as e:
@@ -221,6 +312,7 @@ class Sensor:
     def on_disconnect(self, client, userdata, rc):
         """Callback when disconnecting"""
         self.is_connected = False
+        self._connected_event.clear()
         logger.warning(f"{self.sensor_id}: Disconnected from broker")
 
     def connect(self):
@@ -230,14 +322,7 @@ class Sensor:
 
             # Configure Last Will Testament (LWT) for offline status
             lwt_site = self.site or "pending"
-            lwt_payload = json.dumps({
-                "sensor_id": self.sensor_id,
-                "status": "offline",
-                "sector": lwt_site,
-                "sensor_type": self.sensor_type,
-                "timestamp": int(time.time()),
-                "reason": "connection_lost"
-            })
+            lwt_payload = _STATUS_LWT_TMPL % (self._id_json, json_dumps(lwt_site), self._type_json, int(time.time()))
             self.client.will_set(
                 status_topic(lwt_site, self.sensor_type, self.sensor_id), 
                 lwt_payload, 
@@ -249,12 +334,7 @@ class Sensor:
             self.client.loop_start()
             
             # Wait for connection
-            timeout = 5
-            start = time.time()
-            while not self.is_connected and (time.time() - start) < timeout:
-                time.sleep(0.1)
-            
-            if not self.is_connected:
+            if not self._connected_event.wait(timeout=5):
                 raise ConnectionError("Timeout al conectar")
                 
         except Exception as e:
@@ -277,6 +357,9 @@ class Sensor:
             logger.warning(f"{self.sensor_id}: Not connected, skipping data publish")
             return
         
+        # One timestamp for everything published this cycle
+        now = int(time.time())
+        
         # 1. Get measurements
         measurements = sample_measurements(self.sensor_type)
         temp = measurements.get("temperature_c", 0)
@@ -289,46 +372,56 @@ class Sensor:
         # 3. Calculate local risk based on trends and patterns
         local_risk = self.brain.calculate_local_risk()
         
-        # 4. Publish raw telemetry data
-        data_payload = {
-            "sensor_id": self.sensor_id,
-            "timestamp": int(time.time()),
-            **measurements
-        }
-        self.client.publish(
-            data_topic(self.site, self.sensor_type, self.sensor_id),
-            json.dumps(data_payload),
-            qos=1
-        )
-        logger.info(f"{self.sensor_id}: Published data - T:{temp:.1f}°C P:{pressure:.1f}hPa H:{humidity:.0f}%")
+        # 4. Serialize raw telemetry data
+        data_payload = self._data_payload
+        data_payload["timestamp"] = now
+        data_payload.update(measurements)
+        data_bytes = json_dumps(data_payload)
         
-        # 5. Publish belief (opinion about risk) for neighbors
+        # 5. Serialize belief (opinion about risk) for neighbors, unless it
+        # tells them nothing new
         belief_payload = self.brain.get_belief_summary()
-        belief_payload["timestamp"] = int(time.time())
-        self.client.publish(
-            belief_topic(self.site, self.sensor_type, self.sensor_id),
-            json.dumps(belief_payload),
-            qos=1
-        )
-        logger.info(f"{self.sensor_id}: Published belief - Risk:{local_risk:.2f} ({belief_payload['risk_level']})")
+        risk_level = belief_payload.pop("risk_level")
+        belief_state = (risk_level, belief_payload["would_alert"], belief_payload["sensitivity"],
+                        belief_payload["false_alarm_count"], belief_payload["missed_event_count"])
+        belief_bytes = None
+        if (self._last_belief_risk is None
+                or abs(local_risk - self._last_belief_risk) > BELIEF_RISK_EPSILON
+                or belief_state != self._last_belief_state
+                or now - self._last_belief_time >= BELIEF_REFRESH_S - self._cycle_interval):
+            belief_payload["timestamp"] = now
+            del belief_payload["sensor_id"]  # already in the prefix
+            belief_bytes = self._belief_prefix + _RISK_LEVEL_JSON[risk_level] + json_dumps(belief_payload)[1:]
+            self._last_belief_risk = local_risk
+            self._last_belief_state = belief_state
+            self._last_belief_time = now
         
-        # 6. Generate alert if consensus with neighbors
-        if self.brain.should_alert():
-            alert_payload = {
-                "sensor_id": self.sensor_id,
-                "timestamp": int(time.time()),
-                "alert_type": "weather_risk",
-                "risk_level": local_risk,
-                "message": f"High risk detected (local:{local_risk:.2f}, neighbors agree)",
-                "measurements": measurements
-            }
-            self.client.publish(
-                alert_topic(self.site, self.sensor_type, self.sensor_id),
-                json.dumps(alert_payload),
-                qos=1
-            )
-            logger.warning(f"{self.sensor_id}: ALERT GENERATED - Risk:{local_risk:.2f}")
+        # 6. Serialize alert if consensus with neighbors
+        alert_bytes = None
+        if belief_payload["would_alert"]:
+            alert_payload = self._alert_payload
+            alert_payload["timestamp"] = now
+            alert_payload["risk_level"] = local_risk
+            alert_payload["message"] = f"High risk detected (local:{local_risk:.2f}, neighbors agree)"
+            alert_payload["measurements"] = measurements
+            alert_bytes = json_dumps(alert_payload)
+        
+        # Hand everything to paho back-to-back so the network thread can
+        # flush the whole cycle together. Telemetry is re-sent every cycle and
+        # beliefs at least every BELIEF_REFRESH_S, so they go at QoS 0; only
+        # alerts need an ack.
+        self.client.publish(self._data_topic, data_bytes, qos=0)
+        if belief_bytes is not None:
+            self.client.publish(self._belief_topic, belief_bytes, qos=0)
+        if alert_bytes is not None:
+            self.client.publish(self._alert_topic, alert_bytes, qos=1)
         
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s: Published data - T:%.1f°C P:%.1fhPa H:%.0f%%", self.sensor_id, temp, pressure, humidity)
+            if belief_bytes is not None:
+                logger.debug("%s: Published belief - Risk:%.2f (%s)", self.sensor_id, local_risk, risk_level)
+        if alert_bytes is not None:
+            logger.warning(f"{self.sensor_id}: ALERT GENERATED - Risk:{local_risk:.2f}")
     
     def run(self, interval: int = 5):
         """
@@ -345,11 +438,7 @@ class Sensor:
         # Wait for sector assignment (if not provided at startup)
         if not self.site:
             logger.info(f"{self.sensor_id}: Waiting for sector assignment from monitor...")
-            timeout = 30  # 30 segundos de timeout
-            elapsed = 0
-            while not self.sector_assigned and self.running and elapsed < timeout:
-                time.sleep(0.5)
-                elapsed += 0.5
+            self._sector_event.wait(timeout=30)  # 30 segundos de timeout
             
             if not self.sector_assigned:
                 logger.error(f"{self.sensor_id}: Timeout waiting for sector assignment. Shutting down...")
@@ -367,13 +456,15 @@ class Sensor:
                     
                     # DAI: Calculate adaptive interval based on neighbor activity
                     adaptive_interval = self.brain.calculate_adaptive_interval(self.publish_interval)
+                    self._cycle_interval = adaptive_interval
                     
                     if adaptive_interval != self.publish_interval:
                         logger.info(f"{self.sensor_id}: Adaptive interval: {adaptive_interval}s (neighbors: {self.brain.active_neighbors_count})")
                     
-                    time.sleep(adaptive_interval)
+                    if self._stop.wait(timeout=adaptive_interval):
+                        break
                 else:
-                    time.sleep(1)  # Wait if no sector yet
+                    self._sector_event.wait(timeout=1)  # Wait if no sector yet
                 
         except KeyboardInterrupt:
             logger.info(f"{self.sensor_id}: Stopped by user")
@@ -385,14 +476,8 @@ class Sensor:
         logger.info(f"{self.sensor_id}: Disconnecting...")
         
         # Publish offline status
-        status_payload = json.dumps({
-            "sensor_id": self.sensor_id,
-            "status": "offline",
-            "sector": self.site,
-            "sensor_type": self.sensor_type,
-            "timestamp": int(time.time())
-        })
-        self.client.publish(status_topic(self.site, self.sensor_type, self.sensor_id), status_payload, qos=1)
+        status_payload = _STATUS_OFFLINE_TMPL % (self._id_json, json_dumps(self.site), self._type_json, int(time.time()))
+        self.client.publish(self._status_topic, status_payload, qos=1)
         
         self.client.loop_stop()
         self.client.disconnect()
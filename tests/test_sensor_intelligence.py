@@ -0,0 +1,91 @@
+"""
+Tests for SensorBrain ring-buffer ingestion and neighbor consensus
+(sensor_intelligence.py).
+
+Run from the project root with:  python -m unittest discover tests
+"""
+
+import logging
+import random
+import sys
+import unittest
+from pathlib import Path
+
+# The sensor modules import each other as top-level modules from src/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from sensor_intelligence import CONSENSUS_THRESHOLD, SensorBrain  # noqa: E402
+
+logging.disable(logging.CRITICAL)
+
+
+def _state(brain: SensorBrain):
+    return (list(brain.temp_buf), list(brain.pressure_buf), list(brain.humidity_buf),
+            brain._write_idx, brain._count)
+
+
+class AddMeasurementsBatchTest(unittest.TestCase):
+
+    def test_length_mismatch_raises_and_leaves_buffers_untouched(self):
+        brain = SensorBrain("test", history_size=10)
+        brain.add_measurement(5.0, 1010.0, 40.0)
+        before = _state(brain)
+
+        with self.assertRaises(ValueError):
+            brain.add_measurements_batch([1.0] * 4, [1000.0] * 2, [50.0] * 4)
+        with self.assertRaises(ValueError):
+            brain.add_measurements_batch([1.0] * 4, [1000.0] * 4, [50.0] * 5)
+
+        self.assertEqual(_state(brain), before)
+        self.assertEqual(len(brain.pressure_buf), 10)
+
+        # Ordinary ingestion keeps working afterwards
+        brain.add_measurement(6.0, 1009.0, 41.0)
+        self.assertEqual(brain._count, 2)
+
+    def test_matches_sequential_ingestion_across_wraparound(self):
+        for history_size in (1, 3, 10):
+            for prefill in (0, 2, 7):
+                for batch in (0, 1, 4, history_size, 25):
+                    with self.subTest(history_size=history_size, prefill=prefill, batch=batch):
+                        seq = SensorBrain("seq", history_size=history_size)
+                        bulk = SensorBrain("bulk", history_size=history_size)
+                        for i in range(prefill):
+                            seq.add_measurement(float(i), 1000.0 + i, 50.0 + i)
+                            bulk.add_measurement(float(i), 1000.0 + i, 50.0 + i)
+
+                        temps = [100.0 + i for i in range(batch)]
+                        pressures = [900.0 + i for i in range(batch)]
+                        humidities = [10.0 + i for i in range(batch)]
+                        for sample in zip(temps, pressures, humidities):
+                            seq.add_measurement(*sample)
+                        bulk.add_measurements_batch(temps, tuple(pressures), humidities)
+
+                        self.assertEqual(_state(bulk), _state(seq))
+                        self.assertEqual(len(bulk.temp_buf), history_size)
+
+
+class NeighborConsensusTest(unittest.TestCase):
+
+    def test_average_after_many_updates_is_exact(self):
+        neighbors = ("n1", "n2", "n3")
+        for seed in range(200):
+            with self.subTest(seed=seed):
+                rng = random.Random(seed)
+                brain = SensorBrain("test")
+                for _ in range(50):
+                    brain.update_neighbor_belief(rng.choice(neighbors), rng.random())
+                for neighbor_id in neighbors:
+                    brain.update_neighbor_belief(neighbor_id, CONSENSUS_THRESHOLD)
+
+                self.assertGreaterEqual(brain.get_neighbors_average_risk(), CONSENSUS_THRESHOLD)
+                brain.local_risk = brain.risk_threshold
+                self.assertTrue(brain.should_alert())
+
+    def test_no_neighbors(self):
+        brain = SensorBrain("test")
+        self.assertIsNone(brain.get_neighbors_average_risk())
+
+
+if __name__ == "__main__":
+    unittest.main()